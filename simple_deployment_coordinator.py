@@ -2,6 +2,7 @@
 """
 Job Coffin V5 - Simple Deployment Coordinator
 Uses only built-in Python modules - no external dependencies needed
+(orjson is picked up for JSON output if installed)
 """
 
 import subprocess
@@ -9,64 +10,249 @@ import sys
 import os
 import time
 import json
+import logging
+import logging.handlers
+import queue
+import selectors
+import signal
+import socket
+import urllib.request
+import shutil
+import hashlib
+import asyncio
 from pathlib import Path
 
-def run_command(command, description=""):
-    """Execute PowerShell command and return result"""
-    print(f"🔍 {description or command}")
+try:
+    import orjson  # optional speedup, stdlib json is used when unavailable
+except ImportError:
+    orjson = None
+
+# Set JOBCOFFIN_VERBOSE=1 to echo command output as well as failures
+VERBOSE = os.environ.get("JOBCOFFIN_VERBOSE") == "1"
+
+log = logging.getLogger("jobcoffin")
+
+# (executable, display name) for each required tool
+_REQUIREMENTS = (
+    ("git", "Git"),
+    ("node", "Node.js"),
+    ("npm", "npm"),
+    ("gh", "GitHub CLI")
+)
+
+# Log format strings shared by the command runners
+_RUN = "🔍 %s"
+_OK = "✅ Success: %s"
+_ERR = "❌ Error: %s"
+
+# Project layout, resolved once at import
+PROJECT_ROOT = Path(r"C:\dev\jobcoffin-v5").resolve()
+SRC_DIR = PROJECT_ROOT / "src"
+PKG_JSON = PROJECT_ROOT / "package.json"
+SERVER_JS = SRC_DIR / "index.js"
+RAILWAY_JSON = PROJECT_ROOT / "railway.json"
+# Written only after `npm install` succeeds
+INSTALL_MARKER = PROJECT_ROOT / "node_modules" / ".jobcoffin-installed"
+
+# Successful requirement checks are remembered for a day per PATH value
+REQ_CACHE = Path(os.environ.get("LOCALAPPDATA") or Path.home()) / "jobcoffin" / "reqcache.json"
+REQ_CACHE_TTL = 24 * 60 * 60
+
+# Background `npm start` process, terminated on exit
+_SERVER_PROC = None
+
+# Project files rewritten during this run
+_CHANGED_FILES = set()
+
+def dump_json(obj):
+    """Serialize obj to indented JSON bytes in one shot"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+def setup_logging():
+    """Route command logging through a background thread, return its listener"""
+    q = queue.Queue(-1)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(q, handler)
+    log.addHandler(logging.handlers.QueueHandler(q))
+    log.setLevel(logging.DEBUG if VERBOSE else logging.INFO)
+    log.propagate = False
+    listener.start()
+    return listener
+
+def write_if_changed(path, data):
+    """Write data to path unless it already holds exactly that content"""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.write_bytes(data)
+    _CHANGED_FILES.add(path)
+    return True
+
+def probe_all(names):
+    """Locate several executables in one pass over PATH, return {name: path}"""
+    if os.name == "nt":
+        exts = os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").lower().split(";")
+        norm = str.lower
+    else:
+        exts = [""]
+        norm = str
+    wanted = {norm(name) + ext: name for name in names for ext in exts}
+    
+    found = {}
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        if not d:
+            continue
+        try:
+            with os.scandir(d) as entries:
+                for entry in entries:
+                    name = wanted.get(norm(entry.name))
+                    if name is None or name in found or entry.is_dir():
+                        continue
+                    if os.name == "nt" or os.access(entry.path, os.X_OK):
+                        found[name] = entry.path
+        except OSError:
+            continue
+        if len(found) == len(set(names)):
+            break
+    return found
+
+def run_exec(argv, description="", cwd=None):
+    """Execute a program directly (no shell) and return result"""
+    log.info(_RUN, description or ' '.join(argv))
+    # Resolve through PATH/PATHEXT so npm.cmd and friends launch without a shell
+    exe = shutil.which(argv[0]) or argv[0]
     try:
         result = subprocess.run(
-            ["powershell", "-Command", command], 
-            capture_output=True, 
-            text=True, 
+            [exe, *argv[1:]],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
             check=True
         )
-        print(f"✅ Success: {result.stdout.strip()}")
+        log.debug(_OK, result.stdout.strip())
         return True, result.stdout.strip()
     except subprocess.CalledProcessError as e:
-        print(f"❌ Error: {e.stderr.strip() if e.stderr else 'Command failed'}")
+        log.error(_ERR, e.stderr.strip() if e.stderr else 'Command failed')
         return False, e.stderr.strip() if e.stderr else "Command failed"
     except FileNotFoundError:
-        print(f"❌ PowerShell not found")
-        return False, "PowerShell not found"
+        log.error("❌ %s not found", argv[0])
+        return False, f"{argv[0]} not found"
+
+def run_streaming(argv, description="", cwd=None):
+    """Execute a program directly, echoing its output as it arrives"""
+    log.info(_RUN, description or ' '.join(argv))
+    exe = shutil.which(argv[0]) or argv[0]
+    # select() only accepts sockets on Windows, so merge stderr into one pipe there
+    merged = os.name == "nt"
+    try:
+        proc = subprocess.Popen(
+            [exe, *argv[1:]],
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT if merged else subprocess.PIPE
+        )
+    except FileNotFoundError:
+        log.error("❌ %s not found", argv[0])
+        return False, f"{argv[0]} not found"
+    
+    if merged:
+        for data in iter(lambda: proc.stdout.read1(65536), b""):
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+    else:
+        with selectors.DefaultSelector() as sel:
+            sel.register(proc.stdout, selectors.EVENT_READ, sys.stdout.buffer)
+            sel.register(proc.stderr, selectors.EVENT_READ, sys.stderr.buffer)
+            while sel.get_map():
+                for key, _ in sel.select():
+                    data = key.fileobj.read1(65536)
+                    if not data:
+                        sel.unregister(key.fileobj)
+                        continue
+                    key.data.write(data)
+                    key.data.flush()
+    
+    if proc.wait() != 0:
+        log.error(_ERR, f"exited with code {proc.returncode}")
+        return False, f"exited with code {proc.returncode}"
+    return True, ""
+
+async def run_exec_async(argv, description="", cwd=None):
+    """Execute a program directly (no shell) without blocking the event loop"""
+    log.info(_RUN, description or ' '.join(argv))
+    exe = shutil.which(argv[0]) or argv[0]
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            exe, *argv[1:],
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        log.error("❌ %s not found", argv[0])
+        return False, f"{argv[0]} not found"
+    stdout, stderr = await proc.communicate()
+    stdout = stdout.decode(errors="replace").strip()
+    stderr = stderr.decode(errors="replace").strip()
+    if proc.returncode != 0:
+        log.error(_ERR, stderr or 'Command failed')
+        return False, stderr or "Command failed"
+    log.debug(_OK, stdout)
+    return True, stdout
 
 def check_requirements():
     """Check system requirements"""
     print("🔍 CHECKING SYSTEM REQUIREMENTS...")
     
-    requirements = {
-        "git --version": "Git",
-        "node --version": "Node.js", 
-        "npm --version": "npm",
-        "gh --version": "GitHub CLI"
-    }
+    key = hashlib.blake2b(os.environ.get("PATH", "").encode(), digest_size=16).hexdigest()
+    try:
+        entry = json.loads(REQ_CACHE.read_bytes())
+        if entry["key"] == key and entry["ok"] and time.time() - entry["ts"] < REQ_CACHE_TTL:
+            print("✅ Requirements verified recently - skipping checks")
+            return True
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
     
-    all_good = True
-    for cmd, name in requirements.items():
-        success, output = run_command(cmd, f"Checking {name}")
-        if not success:
+    # Only presence on PATH matters, so no need to launch each tool
+    found = probe_all([exe for exe, _ in _REQUIREMENTS])
+    missing = [name for exe, name in _REQUIREMENTS if exe not in found]
+    if missing:
+        for name in missing:
             print(f"❌ {name} not installed")
-            all_good = False
+        return False
+    
+    print("✅ All required tools found")
+    try:
+        REQ_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        REQ_CACHE.write_bytes(dump_json({"key": key, "ts": time.time(), "ok": True}))
+    except OSError:
+        pass  # Caching is best effort
     
-    return all_good
+    return True
 
 def create_deployment_structure():
     """Create basic project structure"""
     print("📁 CREATING PROJECT STRUCTURE...")
     
-    commands = [
-        "New-Item -ItemType Directory -Path 'C:\\dev\\jobcoffin-v5' -Force",
-        "Set-Location 'C:\\dev\\jobcoffin-v5'",
-        "git init",
-        "New-Item -ItemType File -Name 'package.json' -Force",
-        "New-Item -ItemType Directory -Name 'src' -Force"
-    ]
+    try:
+        PROJECT_ROOT.mkdir(parents=True, exist_ok=True)
+        SRC_DIR.mkdir(exist_ok=True)
+        if not PKG_JSON.exists():
+            PKG_JSON.touch()
+    except OSError as e:
+        print(f"❌ Failed to create project structure: {e}")
+        return False
     
-    for cmd in commands:
-        success, output = run_command(cmd)
-        if not success:
-            return False
+    success, output = run_exec(["git", "init"], "Initializing git repository", cwd=os.fspath(PROJECT_ROOT))
+    if not success:
+        return False
     
+    print(f"✅ Project structure created at {PROJECT_ROOT}")
     return True
 
 def create_package_json():
@@ -89,9 +275,10 @@ def create_package_json():
     }
     
     try:
-        with open("C:\\dev\\jobcoffin-v5\\package.json", "w") as f:
-            json.dump(package_content, f, indent=2)
-        print("✅ Package.json created")
+        if write_if_changed(PKG_JSON, dump_json(package_content)):
+            print("✅ Package.json created")
+        else:
+            print("✅ Package.json already up to date")
         return True
     except Exception as e:
         print(f"❌ Failed to create package.json: {e}")
@@ -136,10 +323,11 @@ app.listen(PORT, '0.0.0.0', () => {
 '''
     
     try:
-        os.makedirs("C:\\dev\\jobcoffin-v5\\src", exist_ok=True)
-        with open("C:\\dev\\jobcoffin-v5\\src\\index.js", "w") as f:
-            f.write(server_content)
-        print("✅ Basic server created")
+        SRC_DIR.mkdir(parents=True, exist_ok=True)
+        if write_if_changed(SERVER_JS, server_content.encode("utf-8")):
+            print("✅ Basic server created")
+        else:
+            print("✅ Basic server already up to date")
         return True
     except Exception as e:
         print(f"❌ Failed to create server: {e}")
@@ -149,38 +337,125 @@ def install_dependencies():
     """Install npm dependencies"""
     print("📦 INSTALLING DEPENDENCIES...")
     
-    os.chdir("C:\\dev\\jobcoffin-v5")
-    success, output = run_command("npm install", "Installing npm packages")
+    # Nothing to resolve again if the last install succeeded against this package.json;
+    # a bare node_modules may be left over from a failed install
+    try:
+        if PKG_JSON not in _CHANGED_FILES and INSTALL_MARKER.stat().st_mtime >= PKG_JSON.stat().st_mtime:
+            print("✅ Dependencies already installed")
+            return True
+    except FileNotFoundError:
+        pass
+    
+    INSTALL_MARKER.unlink(missing_ok=True)
+    success, output = run_streaming(["npm", "install"], "Installing npm packages", cwd=os.fspath(PROJECT_ROOT))
+    if success:
+        try:
+            INSTALL_MARKER.touch()
+        except OSError:
+            pass  # Only costs a reinstall next run
     return success
 
 def test_local_server():
     """Test the server locally"""
+    global _SERVER_PROC
     print("🧪 TESTING LOCAL SERVER...")
     
+    # A leftover server would answer the readiness probe before ours is up
+    try:
+        socket.create_connection(("127.0.0.1", 3000), timeout=0.1).close()
+        print("❌ Port 3000 already in use - stop the other server and try again")
+        return False
+    except OSError:
+        pass
+    
     # Start server in background
     print("Starting server locally for testing...")
-    success, output = run_command("Start-Process -NoNewWindow npm -ArgumentList 'start'", "Starting server")
+    try:
+        # Own process group so npm and the node child it spawns can be stopped together
+        if os.name == "nt":
+            group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {"start_new_session": True}
+        _SERVER_PROC = subprocess.Popen(
+            [shutil.which("npm") or "npm", "start"],
+            cwd=os.fspath(PROJECT_ROOT),
+            **group
+        )
+    except OSError as e:
+        print(f"❌ Failed to start server: {e}")
+        return False
     
-    if success:
-        print("✅ Server started locally")
-        print("🌐 Test at: http://localhost:3000")
-        print("🩺 Health check: http://localhost:3000/api/health")
-        return True
-    else:
-        print("❌ Failed to start server")
+    # Wait until the port accepts connections instead of assuming it does
+    deadline = time.monotonic() + 5
+    delay = 0.05
+    while True:
+        if _SERVER_PROC.poll() is not None:
+            print(f"❌ Server exited with code {_SERVER_PROC.returncode}")
+            return False
+        try:
+            socket.create_connection(("127.0.0.1", 3000), timeout=0.1).close()
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                print("❌ Server did not start listening on port 3000 within 5 seconds")
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+    
+    try:
+        # Same IPv4 address as the probe - localhost may try ::1 first on Windows
+        with urllib.request.urlopen("http://127.0.0.1:3000/api/health", timeout=2) as resp:
+            print(f"✅ Health check: {resp.read().decode(errors='replace').strip()}")
+    except OSError as e:
+        print(f"❌ Health check failed: {e}")
+        return False
+    
+    # Make sure it was our process that answered and it is still alive
+    if _SERVER_PROC.poll() is not None:
+        print(f"❌ Server exited with code {_SERVER_PROC.returncode}")
         return False
+    
+    print("✅ Server started locally")
+    print("🌐 Test at: http://localhost:3000")
+    print("🩺 Health check: http://localhost:3000/api/health")
+    return True
 
-def setup_github_repo():
+def stop_local_server():
+    """Stop the background server started by test_local_server"""
+    if _SERVER_PROC is None or _SERVER_PROC.poll() is not None:
+        return
+    if os.name == "nt":
+        # npm is a batch file there, and cmd.exe answers CTRL_BREAK_EVENT with a
+        # "Terminate batch job (Y/N)?" prompt, so kill the whole tree outright
+        subprocess.run(
+            ["taskkill", "/T", "/F", "/PID", str(_SERVER_PROC.pid)],
+            capture_output=True
+        )
+        try:
+            _SERVER_PROC.wait(5)
+        except subprocess.TimeoutExpired:
+            _SERVER_PROC.kill()  # taskkill failed; at least reap the leader
+            _SERVER_PROC.wait()
+        return
+    os.killpg(_SERVER_PROC.pid, signal.SIGTERM)
+    try:
+        _SERVER_PROC.wait(5)
+    except subprocess.TimeoutExpired:
+        # Kill the whole group - node holds the port, not npm itself
+        os.killpg(_SERVER_PROC.pid, signal.SIGKILL)
+        _SERVER_PROC.wait()
+
+async def setup_github_async():
     """Set up GitHub repository"""
     print("📱 SETTING UP GITHUB REPOSITORY...")
     
     commands = [
-        "gh auth status",
-        "gh repo create jobcoffin-v5 --private --source=. --remote=origin --push"
+        ["gh", "auth", "status"],
+        ["gh", "repo", "create", "jobcoffin-v5", "--private", "--source=.", "--remote=origin", "--push"]
     ]
     
     for cmd in commands:
-        success, output = run_command(cmd)
+        success, output = await run_exec_async(cmd, cwd=os.fspath(PROJECT_ROOT))
         if not success:
             print(f"⚠️  GitHub setup failed: {output}")
             print("💡 You can set up GitHub manually later")
@@ -189,11 +464,8 @@ def setup_github_repo():
     print("✅ GitHub repository created")
     return True
 
-def deploy_to_railway():
-    """Deploy to Railway"""
-    print("🚄 DEPLOYING TO RAILWAY...")
-    
-    # Create railway.json
+def create_railway_config():
+    """Create railway.json"""
     railway_config = {
         "build": {
             "builder": "NIXPACKS"
@@ -204,15 +476,20 @@ def deploy_to_railway():
     }
     
     try:
-        with open("C:\\dev\\jobcoffin-v5\\railway.json", "w") as f:
-            json.dump(railway_config, f, indent=2)
-        print("✅ Railway configuration created")
+        if write_if_changed(RAILWAY_JSON, dump_json(railway_config)):
+            print("✅ Railway configuration created")
+        else:
+            print("✅ Railway configuration already up to date")
+        return True
     except Exception as e:
         print(f"❌ Failed to create railway.json: {e}")
         return False
+
+async def deploy_to_railway_async():
+    """Deploy to Railway"""
+    print("🚄 DEPLOYING TO RAILWAY...")
     
-    # Try Railway deployment
-    success, output = run_command("railway deploy", "Deploying to Railway")
+    success, output = await run_exec_async(["railway", "deploy"], "Deploying to Railway", cwd=os.fspath(PROJECT_ROOT))
     if success:
         print("✅ Deployed to Railway!")
         return True
@@ -221,6 +498,14 @@ def deploy_to_railway():
         print("💡 Visit railway.app to connect your GitHub repo manually")
         return False
 
+async def run_remote_phases():
+    """Run GitHub setup and Railway deployment concurrently"""
+    return await asyncio.gather(
+        setup_github_async(),
+        deploy_to_railway_async(),
+        return_exceptions=True
+    )
+
 def main():
     """Main deployment process"""
     print("🚀 JOB COFFIN V5 - SIMPLE DEPLOYMENT COORDINATOR")
@@ -261,13 +546,16 @@ def main():
     print("\n🧪 PHASE 4: LOCAL TESTING")
     test_local_server()  # Non-blocking
     
-    # Phase 5: GitHub setup
-    print("\n📱 PHASE 5: GITHUB SETUP")
-    setup_github_repo()  # Non-blocking if fails
-    
-    # Phase 6: Railway deployment
-    print("\n🚄 PHASE 6: RAILWAY DEPLOYMENT")
-    deploy_to_railway()  # Non-blocking if fails
+    # Phase 5 + 6: GitHub setup and Railway deployment are independent,
+    # so run them side by side
+    print("\n📱🚄 PHASE 5 + 6: GITHUB SETUP & RAILWAY DEPLOYMENT")
+    if create_railway_config():
+        results = asyncio.run(run_remote_phases())  # Non-blocking if fails
+    else:
+        results = [asyncio.run(setup_github_async())]
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"⚠️  Remote setup step failed: {result}")
     
     # Success!
     total_time = time.time() - start_time
@@ -277,7 +565,7 @@ def main():
     print(f"⏱️  Total time: {total_time:.1f} seconds")
     print("🌐 Local server: http://localhost:3000")
     print("🩺 Health check: http://localhost:3000/api/health")
-    print("📁 Project location: C:\\dev\\jobcoffin-v5")
+    print(f"📁 Project location: {PROJECT_ROOT}")
     print("\n💡 Next steps:")
     print("1. Test your local server")
     print("2. Set up Railway deployment manually if needed")
@@ -288,6 +576,7 @@ def main():
     return True
 
 if __name__ == "__main__":
+    listener = setup_logging()
     try:
         main()
     except KeyboardInterrupt:
@@ -295,4 +584,14 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n\n❌ Unexpected error: {e}")
     finally:
-        input("\nPress Enter to exit...")
+        listener.stop()  # Flush queued log lines before prompting
+        try:
+            # Only pause for a human - never block CI or piped runs
+            if sys.stdin and sys.stdin.isatty():
+                try:
+                    input("\nPress Enter to exit...")
+                except (EOFError, KeyboardInterrupt):
+                    pass
+        finally:
+            # npm runs in its own process group, so Ctrl+C never reaches it
+            stop_local_server()